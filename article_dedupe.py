@@ -0,0 +1,161 @@
+# article_dedupe.py
+#
+# Batch saving shared by crhoy_range_date_save_db.py and
+# diarioextra_range_date_save_db.py. Articles are keyed by a content hash
+# so the same article scraped under another URL (trailing slash, query
+# string, ...) is only saved once; this needs the content_hash column from
+# sql/002_articles_content_hash.sql.
+
+import hashlib
+import logging
+import threading
+
+# Values per "already stored?" lookup; keeps the GET query string short
+EXISTING_CHECK_SIZE = 50
+
+# Postgres unique_violation SQLSTATE
+UNIQUE_VIOLATION = "23505"
+
+
+def content_hash(article):
+    """
+    Hash of an article's title and body, used to spot the same article
+    under another URL. None for an article without a body (video and
+    gallery pages), whose title alone says too little to compare on.
+    """
+    if not article.get('body'):
+        return None
+    text = f"{article.get('title') or ''}\n{article['body']}"
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def is_content_clash(error):
+    """
+    True if error is a unique violation on content_hash, i.e. the content
+    was stored under another URL after it was looked up.
+    """
+    text = str(error)
+    return UNIQUE_VIOLATION in text and "content_hash" in text
+
+
+class ContentFilter:
+    """
+    Content hashes known to be stored, shared by the writer threads of a
+    run. A hash is only added once its row is saved or found in the table,
+    so content whose save failed can still be saved under another URL.
+    """
+
+    def __init__(self, client=None):
+        # Supabase client for the "already stored?" lookup; None skips it,
+        # e.g. when the insert itself ignores content_hash conflicts
+        self._client = client
+        self._stored = set()
+        self._lock = threading.Lock()
+
+    def _lookup(self, hashes):
+        found = set()
+        for start in range(0, len(hashes), EXISTING_CHECK_SIZE):
+            chunk = hashes[start:start + EXISTING_CHECK_SIZE]
+            resp = self._client.table('articles').select('content_hash').in_('content_hash', chunk).execute()
+            found.update(row['content_hash'] for row in resp.data)
+        return found
+
+    def split(self, articles):
+        """
+        Set each article's content_hash and return (fresh, twins, stored):
+        the first article for each hash not known to be stored, the later
+        articles with the same content keyed by hash, and the articles
+        whose content is already stored. The local set is checked first,
+        so only new hashes are looked up. Articles without a hash are
+        always fresh.
+        """
+        fresh, twins, stored = {}, {}, []
+        unhashed = []
+        with self._lock:
+            for article in articles:
+                h = article['content_hash'] = content_hash(article)
+                if h is None:
+                    unhashed.append(article)
+                elif h in self._stored:
+                    stored.append(article)
+                elif h in fresh:
+                    twins.setdefault(h, []).append(article)
+                else:
+                    fresh[h] = article
+        if fresh and self._client is not None:
+            try:
+                found = self._lookup(list(fresh))
+            except Exception as e:
+                # Clashes the lookup would have caught are still skipped on insert
+                logging.warning(f"Could not check for stored content: {e}")
+                found = set()
+            for h in found:
+                stored.append(fresh.pop(h))
+                stored.extend(twins.pop(h, []))
+            self.mark_stored(found)
+        return list(fresh.values()) + unhashed, twins, stored
+
+    def mark_stored(self, hashes):
+        with self._lock:
+            self._stored.update(hashes)
+
+
+def save_articles(articles, upsert, content_filter, errors):
+    """
+    Save article dicts with upsert(rows), which returns the number of rows
+    inserted, skipping content that is already stored. A batch that fails
+    is retried one row at a time, so only the bad rows are lost; those are
+    appended to `errors` as (url, message). Returns (saved, inserted):
+    articles saved or skipped as already stored and, of those, rows that
+    were new.
+    """
+    fresh, twins, stored = content_filter.split(articles)
+    for article in stored:
+        logging.info(f"Skipped article, content already stored: {article.get('url')}")
+    saved, inserted = len(stored), 0
+    if not fresh:
+        return saved, inserted
+
+    done, clashed = [], []
+    try:
+        inserted = upsert(fresh)
+        done = fresh
+    except Exception as e:
+        error = e
+        if is_content_clash(e):
+            # Some content was stored after the lookup; look again, drop it
+            # and send the rest as one batch once more
+            fresh, _, clashed = content_filter.split(fresh)
+            try:
+                inserted = upsert(fresh) if fresh else 0
+                done, error = fresh, None
+            except Exception as retry_error:
+                error = retry_error
+        if error is not None:
+            logging.error(f"Error saving {len(fresh)} articles: {error}; retrying one by one")
+            for article in fresh:
+                url = article.get('url')
+                try:
+                    inserted += upsert(article)
+                except Exception as row_error:
+                    if is_content_clash(row_error):
+                        clashed.append(article)
+                        continue
+                    logging.error(f"Error saving {url}: {row_error}")
+                    errors.append((url, str(row_error)))
+                    for twin in twins.get(article['content_hash'], []):
+                        errors.append((twin.get('url'), f"same content as {url}, which failed: {row_error}"))
+                    continue
+                done.append(article)
+
+    for article in done:
+        logging.info(f"Saved article: {article.get('url')}")
+    for article in clashed:
+        logging.info(f"Skipped article, content already stored: {article.get('url')}")
+    for article in done + clashed:
+        for twin in twins.get(article['content_hash'], []):
+            logging.info(f"Skipped article, same content as {article.get('url')}: {twin.get('url')}")
+        saved += 1 + len(twins.get(article['content_hash'], []))
+    content_filter.mark_stored(article['content_hash'] for article in done + clashed
+                               if article['content_hash'] is not None)
+    return saved, inserted
@@ -0,0 +1,178 @@
+# article_fetch.py
+#
+# HTTP layer shared by crhoy_scraper.py and diarioextra_scraper.py: fetches
+# article pages concurrently over one keep-alive aiohttp session, under a
+# shared rate limit, and rejects anti-bot challenge pages.
+#
+# Dependencies:
+#   pip install aiohttp aiolimiter
+
+import re
+import queue
+import asyncio
+import threading
+from contextlib import aclosing
+
+import aiohttp
+from aiolimiter import AsyncLimiter
+
+# Upper bound on in-flight article requests
+MAX_CONCURRENCY = 16
+# Token-bucket rate shared by all requests of a fetch_all call
+MAX_REQUESTS_PER_SECOND = 5
+# Fetched pages iter_page_sources holds for a caller that falls behind
+PAGE_BUFFER = 64
+
+# <title> of anti-bot challenge and rate-limit pages served with a 200
+BLOCKED_TITLE_RE = re.compile(
+    r"<title>\s*(just a moment|attention required|access denied|too many requests|security check)",
+    re.IGNORECASE
+)
+
+
+def has_class(name):
+    """XPath predicate for elements whose class list includes `name`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class BlockedError(Exception):
+    """The site answered with an anti-bot challenge instead of the article."""
+
+
+async def fetch(session, url, semaphore, limiter):
+    async with semaphore, limiter:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            html = await resp.text()
+    if m := BLOCKED_TITLE_RE.search(html):
+        raise BlockedError(f"{url} returned a {m.group(1)!r} page")
+    return html
+
+
+def _client_session(headers):
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENCY, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=30)
+    return aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout)
+
+
+async def fetch_all(urls, headers, parse=None):
+    """
+    Fetch all URLs concurrently over a single keep-alive session.
+    Returns the HTML (or the raised exception) for each URL, in input order.
+    If given, parse(html, url) runs in a worker thread on each page, so the
+    event loop keeps receiving pages meanwhile, and its result is returned
+    instead of the HTML.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    limiter = AsyncLimiter(MAX_REQUESTS_PER_SECOND, 1)
+
+    async def fetch_one(session, url):
+        html = await fetch(session, url, semaphore, limiter)
+        if parse is None:
+            return html
+        return await asyncio.to_thread(parse, html, url)
+
+    async with _client_session(headers) as session:
+        return await asyncio.gather(
+            *[fetch_one(session, url) for url in urls],
+            return_exceptions=True
+        )
+
+
+async def iter_fetch(urls, headers):
+    """
+    Like fetch_all, but yields (url, html) pairs as soon as each response
+    arrives instead of waiting for the whole batch. On failure html is the
+    raised exception. MAX_CONCURRENCY workers take URLs one at a time and
+    each waits for its page to be handed over before fetching the next, so
+    a slow consumer holds back the fetches instead of piling up pages: at
+    most one page per worker waits unconsumed.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    limiter = AsyncLimiter(MAX_REQUESTS_PER_SECOND, 1)
+    todo = iter(urls)
+    results = asyncio.Queue(maxsize=1)
+    done = object()
+
+    async def worker(session):
+        # The loop is single-threaded, so workers never get the same URL
+        for url in todo:
+            try:
+                html = await fetch(session, url, semaphore, limiter)
+            except Exception as e:
+                html = e
+            await results.put((url, html))
+
+    async def run_workers(session):
+        await asyncio.gather(*[worker(session) for _ in range(MAX_CONCURRENCY)])
+        await results.put(done)
+
+    async with _client_session(headers) as session:
+        runner = asyncio.create_task(run_workers(session))
+        try:
+            while (item := await results.get()) is not done:
+                yield item
+        finally:
+            # Stop the workers if the caller stopped early
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+
+def get_page_sources(urls, headers):
+    return asyncio.run(fetch_all(urls, headers))
+
+
+def iter_page_sources(urls, headers):
+    """
+    Synchronous version of iter_fetch for non-async callers. The event loop
+    runs in a background thread and keeps fetching while the caller works;
+    at most PAGE_BUFFER pages wait unconsumed, plus those held by the
+    iter_fetch workers. Closing the generator early stops the loop.
+    """
+    pages = queue.Queue(maxsize=PAGE_BUFFER)
+    done = object()
+    error = []
+    running = []
+
+    async def produce():
+        running.append((asyncio.get_running_loop(), asyncio.current_task()))
+        async with aclosing(iter_fetch(urls, headers)) as fetched:
+            async for item in fetched:
+                await asyncio.to_thread(pages.put, item)
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            error.append(e)
+        finally:
+            pages.put(done)
+
+    threading.Thread(target=run, daemon=True).start()
+    finished = False
+    try:
+        while (item := pages.get()) is not done:
+            yield item
+        finished = True
+    finally:
+        if not finished:
+            if running:
+                loop, task = running[0]
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # the loop already closed
+            # Unblock any pending put until the thread signs off
+            while pages.get() is not done:
+                pass
+    if error:
+        raise error[0]
+
+
+def get_page_source(url, headers):
+    html = get_page_sources([url], headers)[0]
+    if isinstance(html, Exception):
+        raise html
+    return html
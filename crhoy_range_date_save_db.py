@@ -2,7 +2,13 @@
 """
 crhoy_range_date_save_db.py
 
-Fetches articles for a date range using crhoy_range_date_scraper.py and saves them to Supabase 'articles' table.
+Fetches articles for a date range using crhoy_range_date_scraper and saves them to Supabase 'articles' table
+in batches while scraping is still running.
+Articles whose URL is already stored are not scraped again, and are skipped on insert
+(requires sql/001_articles_url_unique.sql). Articles whose title and body are already
+stored under another URL are skipped by content_hash (requires sql/002_articles_content_hash.sql).
+If SUPABASE_DB_URL (the Postgres connection string) is set, batches are loaded with COPY
+over a direct connection instead of the REST API; this needs pip install "psycopg[binary]".
 Logs operations and any errors in LOG/crhoy_range_date_save_db_log.
 Usage:
     python crhoy_range_date_save_db.py <start_date> <end_date>
@@ -10,20 +16,15 @@ Usage:
 
 import os
 import sys
-import json
-import subprocess
 import logging
 from datetime import datetime, timezone, timedelta
 
 from dotenv import load_dotenv
 from supabase import create_client
 
-# Spanish to English month mapping for parsing
-SPANISH_TO_ENGLISH = {
-    'Enero': 'January', 'Febrero': 'February', 'Marzo': 'March', 'Abril': 'April',
-    'Mayo': 'May', 'Junio': 'June', 'Julio': 'July', 'Agosto': 'August',
-    'Septiembre': 'September', 'Octubre': 'October', 'Noviembre': 'November', 'Diciembre': 'December'
-}
+from crhoy_range_date_scraper import collect_urls, iter_articles, setup_logging
+from crhoy_scraper import parse_timestamp
+from article_dedupe import EXISTING_CHECK_SIZE, ContentFilter, save_articles
 
 # Load environment variables
 dotenv_path = os.path.join(os.getcwd(), '.env')
@@ -37,16 +38,28 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# Logging setup
+# Optional direct Postgres connection for COPY bulk loads
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL')
+_db_conn = None
+# Columns of 'articles' stored as json/jsonb, read from the catalog on the first COPY
+_json_columns = None
+
+# Columns written by the COPY path, i.e. the keys of a parsed article
+# plus the content_hash added before saving
+ARTICLE_COLUMNS = ('title', 'subtitle', 'body', 'url', 'domain', 'author',
+                   'author_email', 'published_date', 'category', 'tags',
+                   'content_hash')
+
+# Rows per bulk upsert request
+BATCH_SIZE = 500
+
+# Content already stored; the COPY path's INSERT skips such rows itself,
+# so only the REST path looks hashes up
+content_filter = ContentFilter(None if SUPABASE_DB_URL else supabase)
+
+# Log file, set up by main()
 LOG_DIR = os.path.join(os.getcwd(), 'LOG')
 LOG_FILE = os.path.join(LOG_DIR, 'crhoy_range_date_save_db_log')
-os.makedirs(LOG_DIR, exist_ok=True)
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 
 
 def normalize_date(spanish_date, url=None):
@@ -54,21 +67,117 @@ def normalize_date(spanish_date, url=None):
     Convert a Spanish-formatted date like "Mayo 21, 2025 11:37 pm"
     into an ISO8601 UTC timestamp string.
     """
-    pd = spanish_date.replace('\u2003', ' ')
-    for sp, en in SPANISH_TO_ENGLISH.items():
-        if sp in pd:
-            pd = pd.replace(sp, en)
-            break
     try:
-        dt_local = datetime.strptime(pd, '%B %d, %Y %I:%M %p')
-        dt_utc = dt_local + timedelta(hours=6)
-        return dt_utc.replace(tzinfo=timezone.utc).isoformat()
-    except Exception as e:
-        logging.error(f"Date parse error for {url or pd}: {e}")
+        dt_local = parse_timestamp(spanish_date)
+    except ValueError as e:
+        logging.error(f"Date parse error for {url or spanish_date}: {e}")
         return None
+    dt_utc = dt_local + timedelta(hours=6)
+    return dt_utc.replace(tzinfo=timezone.utc).isoformat()
+
+
+def get_db_conn():
+    global _db_conn
+    if _db_conn is None:
+        import psycopg  # only needed when SUPABASE_DB_URL is set
+        _db_conn = psycopg.connect(SUPABASE_DB_URL, autocommit=True)
+    return _db_conn
+
+
+def json_columns(cur):
+    """
+    Return the names of the ARTICLE_COLUMNS that 'articles' stores as json
+    or jsonb. psycopg sends a Python list as a Postgres array literal, which
+    only loads into an array column such as text[].
+    """
+    global _json_columns
+    if _json_columns is None:
+        cur.execute(
+            "SELECT attname FROM pg_attribute WHERE attrelid = 'articles'::regclass"
+            " AND atttypid IN ('json'::regtype, 'jsonb'::regtype)"
+        )
+        _json_columns = {name for (name,) in cur.fetchall()} & set(ARTICLE_COLUMNS)
+    return _json_columns
+
+
+def copy_articles(rows):
+    """
+    Load article dicts with COPY into a temp table, then move them into
+    'articles' with ON CONFLICT DO NOTHING, all in one transaction.
+    Returns the number of rows inserted.
+    """
+    from psycopg.types.json import Jsonb
+    conn = get_db_conn()
+    cols = ', '.join(ARTICLE_COLUMNS)
+    with conn.transaction(), conn.cursor() as cur:
+        # Lists like tags go out as JSON text for json/jsonb columns and as
+        # array literals otherwise
+        as_json = json_columns(cur)
+        # Same column types as 'articles', without its constraints
+        cur.execute(f"CREATE TEMP TABLE articles_load ON COMMIT DROP AS SELECT {cols} FROM articles WITH NO DATA")
+        with cur.copy(f"COPY articles_load ({cols}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([
+                    Jsonb(row[c]) if c in as_json and row.get(c) is not None else row.get(c)
+                    for c in ARTICLE_COLUMNS
+                ])
+        # No conflict target, so rows clashing on url or content_hash are both skipped
+        cur.execute(f"INSERT INTO articles ({cols}) SELECT {cols} FROM articles_load ON CONFLICT DO NOTHING")
+        return cur.rowcount
+
+
+def existing_urls(urls):
+    """
+    Return the subset of urls already stored in 'articles', looked up with
+    one IN query per EXISTING_CHECK_SIZE URLs.
+    """
+    existing = set()
+    for start in range(0, len(urls), EXISTING_CHECK_SIZE):
+        chunk = urls[start:start + EXISTING_CHECK_SIZE]
+        resp = supabase.table('articles').select('url').in_('url', chunk).execute()
+        existing.update(row['url'] for row in resp.data)
+    return existing
+
+
+def upsert_articles(rows):
+    """
+    Upsert one article dict or a list of them, raising on an HTTP error.
+    URLs already in the table are skipped by ON CONFLICT (url) DO NOTHING.
+    Returns the number of rows inserted.
+    """
+    if SUPABASE_DB_URL:
+        return copy_articles(rows if isinstance(rows, list) else [rows])
+    # Ask for the inserted count instead of the rows, so the article bodies
+    # aren't sent back in the response
+    resp = supabase.table('articles').upsert(
+        rows, on_conflict='url', ignore_duplicates=True, returning='minimal', count='exact'
+    ).execute()
+    # Handle HTTP errors for PostgrestResponse
+    status = getattr(resp, 'status_code', None)
+    if status is not None and not (200 <= status < 300):
+        msg = getattr(resp, 'data', resp)
+        raise Exception(f"HTTP {status}: {msg}")
+    return resp.count or 0
+
+
+def save_batch(chunk, first, errors):
+    """
+    Save a batch of articles numbered from `first` with
+    article_dedupe.save_articles, which retries a failed batch one row at a
+    time and appends failures to `errors` as (url, message). Returns
+    (saved, inserted).
+    """
+    chunk_label = f"{first}-{first + len(chunk) - 1}"
+    print(f"Saving articles {chunk_label}")
+    failed = len(errors)
+    saved, inserted = save_articles(chunk, upsert_articles, content_filter, errors)
+    for url, err in errors[failed:]:
+        print(f"Error saving {url}: {err}")
+    return saved, inserted
 
 
 def main():
+    setup_logging(LOG_FILE)
     if len(sys.argv) != 3:
         print("Usage: python crhoy_range_date_save_db.py <start_date> <end_date>")
         sys.exit(1)
@@ -77,55 +186,53 @@ def main():
     print(f"Fetching articles for range {start_date} to {end_date}...")
 
     try:
-        result = subprocess.run(
-            ['python3', 'crhoy_range_date_scraper.py', start_date, end_date],
-            capture_output=True, text=True, check=True
-        )
-    except subprocess.CalledProcessError as e:
-        error_msg = (e.stderr or e.stdout).strip()
-        logging.error(f"Error running scraper: {error_msg}")
-        print(f"Error fetching articles: {error_msg}")
+        start_dt = datetime.fromisoformat(start_date).date()
+        end_dt = datetime.fromisoformat(end_date).date()
+    except ValueError:
+        logging.error(f"Invalid date range: {start_date} to {end_date}")
+        print("Dates must be in YYYY-MM-DD format")
         sys.exit(1)
 
+    urls = collect_urls(start_dt, end_dt)
+    # Don't fetch pages for articles saved by an earlier run
     try:
-        articles = json.loads(result.stdout)
-    except json.JSONDecodeError as e:
-        logging.error(f"JSON decode error: {e}")
-        print(f"Error decoding JSON output: {e}")
-        sys.exit(1)
-
-    total = len(articles)
-    logging.info(f"Fetched {total} articles for saving")
-    print(f"Fetched {total} articles. Normalizing dates and beginning save...")
-
-    for article in articles:
+        stored = existing_urls(urls)
+    except Exception as e:
+        logging.error(f"Could not check for stored articles, scraping all: {e}")
+        stored = set()
+    if stored:
+        urls = [url for url in urls if url not in stored]
+        logging.info(f"Skipping {len(stored)} articles already stored")
+        print(f"Skipping {len(stored)} articles already stored")
+
+    # Articles are saved every BATCH_SIZE as they are scraped, so the whole
+    # range is never held in memory at once
+    total = 0
+    success_count = 0
+    inserted_count = 0
+    errors = []
+    batch = []
+    for article in iter_articles(urls):
+        total += 1
         if 'published_date' in article and article['published_date']:
             iso_date = normalize_date(article['published_date'], article.get('url'))
             if iso_date:
                 article['published_date'] = iso_date
+        batch.append(article)
+        if len(batch) >= BATCH_SIZE:
+            saved, inserted = save_batch(batch, total - len(batch) + 1, errors)
+            success_count += saved
+            inserted_count += inserted
+            batch = []
+    if batch:
+        saved, inserted = save_batch(batch, total - len(batch) + 1, errors)
+        success_count += saved
+        inserted_count += inserted
+    logging.info(f"Fetched {total} articles for saving")
 
-    success_count = 0
-    errors = []
-    for idx, article in enumerate(articles, start=1):
-        url = article.get('url', 'unknown URL')
-        print(f"Saving article {idx}/{total}: {url}")
-        try:
-            resp = supabase.table('articles').insert(article).execute()
-            # Handle HTTP errors for PostgrestResponse
-            status = getattr(resp, 'status_code', None)
-            if status is not None and not (200 <= status < 300):
-                msg = getattr(resp, 'data', resp)
-                raise Exception(f"HTTP {status}: {msg}")
-            success_count += 1
-            logging.info(f"Saved article: {url}")
-        except Exception as e:
-            err_str = str(e)
-            errors.append((url, err_str))
-            logging.error(f"Error saving {url}: {err_str}")
-            print(f"Error saving {url}: {err_str}")
-
-    print(f"Save complete: {success_count}/{total} articles saved.")
-    logging.info(f"Save complete: {success_count}/{total} saved with {len(errors)} errors.")
+    print(f"Save complete: {success_count}/{total} articles saved "
+          f"({inserted_count} new, {success_count - inserted_count} already stored).")
+    logging.info(f"Save complete: {success_count}/{total} saved ({inserted_count} new) with {len(errors)} errors.")
 
     if errors:
         logging.info("Encountered the following errors:")
@@ -10,24 +10,28 @@
 import sys
 import json
 import os
+import queue
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import orjson
 import requests
-from crhoy_scraper import get_page_source, parse_article
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from crhoy_scraper import iter_page_sources, parse_article
 
 # Log file configuration: use a relative 'LOG' directory
 LOG_DIR = os.path.join(os.getcwd(), 'LOG')
 LOG_FILE = os.path.join(LOG_DIR, 'crhoy_range_date_scraper.log')
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR, exist_ok=True)
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Host serving both the sitemaps and the articles they list
+DOMAIN = 'www.crhoy.com'
+
+# Sitemaps downloaded in parallel; also the session's connection pool size
+SITEMAP_WORKERS = 10
 
 # Use a session with a browser-like User-Agent to avoid 403 Forbidden
 session = requests.Session()
@@ -36,6 +40,35 @@ session.headers.update({
     'Accept': 'text/plain, */*; q=0.1',
     'Referer': 'https://www.crhoy.com/'
 })
+# Retry transient sitemap failures with exponential backoff
+# instead of dropping the whole day
+session.mount('https://', HTTPAdapter(
+    max_retries=Retry(total=4, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',)),
+    pool_maxsize=SITEMAP_WORKERS,
+))
+
+def setup_logging(log_file=LOG_FILE):
+    """
+    Log to log_file. Only done when run as a script, so that importers keep
+    their own logging configuration. Records go through a queue and are
+    written by a background thread, so logging in the scrape loop never
+    waits on the disk.
+    """
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s [%(levelname)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    ))
+    log_queue = queue.Queue()
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    # Drain the queue before the interpreter exits
+    atexit.register(listener.stop)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
 
 def daterange(start_date, end_date):
     """
@@ -45,7 +78,83 @@ def daterange(start_date, end_date):
         yield start_date + timedelta(n)
 
 
+def fetch_sitemap(single_date):
+    """
+    Return the article URLs listed in the CRHoy sitemap for single_date.
+    """
+    sitemap_url = f"https://{DOMAIN}/site/dist/sitemap/{single_date}.txt"
+    resp = session.get(sitemap_url, timeout=10)
+    resp.raise_for_status()
+    # Split and strip the raw bytes; only the URLs themselves get decoded
+    return [u.decode() for u in (line.strip() for line in resp.content.splitlines()) if u]
+
+
+def collect_urls(start_date, end_date):
+    """
+    Return the distinct article URLs listed in the daily sitemaps from
+    start_date to end_date (datetime.date, inclusive), in date order.
+    """
+    # Download the daily sitemaps concurrently, then walk them in date order
+    dates = list(daterange(start_date, end_date))
+    urls = []
+    with ThreadPoolExecutor(max_workers=SITEMAP_WORKERS) as pool:
+        futures = [pool.submit(fetch_sitemap, single_date) for single_date in dates]
+        for single_date, future in zip(dates, futures):
+            try:
+                day_urls = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching sitemap for {single_date}: {e}")
+                sys.stderr.write(f"Error fetching sitemap for {single_date}: {e}\n")
+                continue
+            logging.info(f"Found {len(day_urls)} URLs for {single_date}")
+            for url in day_urls:
+                logging.info(f"URL: {url}")
+            urls.extend(day_urls)
+    # Articles can be listed in more than one day's sitemap; fetch each once
+    return list(dict.fromkeys(urls))
+
+
+def iter_articles(urls):
+    """
+    Scrape the given CRHoy article URLs, yielding each article dict as soon
+    as its page has been fetched and parsed.
+    """
+    # One fetch pass for the whole range, so a single keep-alive session
+    # serves every article instead of reconnecting for each day
+    count = 0
+    for url, html in iter_page_sources(urls):
+        try:
+            if isinstance(html, Exception):
+                raise html
+            article = parse_article(html, url, domain=DOMAIN)
+        except Exception as e:
+            logging.error(f"Error scraping {url}: {e}")
+            sys.stderr.write(f"Error scraping {url}: {e}\n")
+            continue
+        count += 1
+        yield article
+
+    logging.info(f"Scraping complete: {count} articles extracted.")
+
+
+def iter_range(start_date, end_date):
+    """
+    Scrape every CRHoy article listed in the daily sitemaps from start_date
+    to end_date (datetime.date, inclusive), yielding each article dict as
+    soon as its page has been fetched and parsed.
+    """
+    return iter_articles(collect_urls(start_date, end_date))
+
+
+def scrape_range(start_date, end_date):
+    """
+    Like iter_range, but returns all the articles as a list.
+    """
+    return list(iter_range(start_date, end_date))
+
+
 def main():
+    setup_logging()
     if len(sys.argv) != 3:
         msg = 'Usage: python crhoy_range_date_scraper.py <start_date> <end_date>'
         logging.error(msg)
@@ -62,34 +171,10 @@ def main():
         sys.stderr.write(json.dumps({'error': msg}) + '\n')
         sys.exit(1)
 
-    all_articles = []
-
-    for single_date in daterange(start_dt, end_dt):
-        sitemap_url = f"https://www.crhoy.com/site/dist/sitemap/{single_date}.txt"
-        try:
-            resp = session.get(sitemap_url, timeout=10)
-            resp.raise_for_status()
-            urls = [u.strip() for u in resp.text.splitlines() if u.strip()]
-            logging.info(f"Found {len(urls)} URLs for {single_date}")
-            for url in urls:
-                logging.info(f"URL: {url}")
-        except Exception as e:
-            logging.error(f"Error fetching sitemap for {single_date}: {e}")
-            sys.stderr.write(f"Error fetching sitemap for {single_date}: {e}\n")
-            continue
-
-        for url in urls:
-            try:
-                html = get_page_source(url)
-                article = parse_article(html, url)
-                all_articles.append(article)
-            except Exception as e:
-                logging.error(f"Error scraping {url}: {e}")
-                sys.stderr.write(f"Error scraping {url}: {e}\n")
+    all_articles = scrape_range(start_dt, end_dt)
 
     # Output all extracted articles as JSON array
-    print(json.dumps(all_articles, ensure_ascii=False, indent=2))
-    logging.info(f"Scraping complete: {len(all_articles)} articles extracted.")
+    sys.stdout.buffer.write(orjson.dumps(all_articles, option=orjson.OPT_INDENT_2) + b"\n")
 
 
 if __name__ == "__main__":
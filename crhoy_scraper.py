@@ -3,105 +3,188 @@
 #
 # Usage:
 #   python crhoy_scraper.py <article_url>
+#   python crhoy_scraper.py - < urls.txt    (one URL per line, one JSON line out per article)
 #
 # Dependencies:
-#   pip install selenium webdriver-manager beautifulsoup4 python-dateutil
+#   pip install aiohttp aiolimiter lxml orjson
 
+import re
 import sys
 import json
+import asyncio
+from datetime import datetime
+from functools import lru_cache
 from urllib.parse import urlparse
-from dateutil import parser as dateparser
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-
-def get_page_source(url, headless=True):
-    opts = Options()
-    if headless:
-        opts.add_argument("--headless=new")  # truly headless on Chrome ≥109
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--log-level=3")
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=opts)
-    driver.get(url)
-    html = driver.page_source
-    driver.quit()
-    return html
-
-
-def parse_article(html, url):
-    soup = BeautifulSoup(html, "lxml")
+import orjson
+import lxml.html
+from lxml import etree
+
+import article_fetch
+from article_fetch import has_class as _class
+
+# Browser-like headers; CRHoy answers bare HTTP clients with 403 Forbidden
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)",
+    "Referer": "https://www.crhoy.com/",
+}
+
+# Month names (lowercase, Spanish and English) to month number, so parsing
+# doesn't depend on the process locale
+MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+
+# e.g. "Mayo 21, 2025 11:37 pm"; \s also matches the em space CRHoy uses
+TIMESTAMP_RE = re.compile(r"(\w+)\s+(\d{1,2}),\s+(\d{4})\s+(\d{1,2}):(\d{2})\s*([ap]m)", re.IGNORECASE)
+
+
+# XPath selectors, compiled once at import. Like CSS selectors they match
+# the context node and its descendants, so they work on subtrees too.
+SEL_TITLE = etree.XPath(f"descendant-or-self::h1[{_class('text-left')} and {_class('titulo')}]")
+SEL_SUBTITLE = etree.XPath(
+    f"descendant-or-self::h3[{_class('text-uppercase')} and {_class('pre-titulo')} and {_class('border-deportes')}]"
+)
+SEL_BODY = etree.XPath("descendant-or-self::div[@id='contenido']")
+SEL_BODY_PARAS = etree.XPath("descendant-or-self::*[self::p or self::blockquote]")
+SEL_AUTHOR = etree.XPath(f"descendant-or-self::span[{_class('autor-nota')}]")
+SEL_AUTHOR_EMAIL = etree.XPath("descendant-or-self::span[@ng-show='displayMail']")
+SEL_DATE = etree.XPath(f"descendant-or-self::span[{_class('fecha-nota')}]")
+SEL_CATEGORY = etree.XPath(f"descendant-or-self::div[{_class('categoria-desktop')}]")
+SEL_TAGS = etree.XPath(f"descendant-or-self::div[{_class('etiquetas')}]")
+SEL_LINKS = etree.XPath("descendant-or-self::a")
+
+
+def get_page_sources(urls):
+    return article_fetch.get_page_sources(urls, HEADERS)
+
+
+def iter_page_sources(urls):
+    return article_fetch.iter_page_sources(urls, HEADERS)
+
+
+def get_page_source(url):
+    return article_fetch.get_page_source(url, HEADERS)
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(text):
+    """
+    Parse a CRHoy timestamp like "Mayo 21, 2025 11:37 pm" into a naive
+    datetime in Costa Rica local time. Raises ValueError if it doesn't match.
+    Results are cached, since articles published in the same minute share
+    the exact same string.
+    """
+    m = TIMESTAMP_RE.match(text.strip())
+    month = MONTHS.get(m.group(1).lower()) if m else None
+    if month is None:
+        raise ValueError(f"unrecognized timestamp {text!r}")
+    hour = int(m.group(4)) % 12
+    if m.group(6).lower() == "pm":
+        hour += 12
+    return datetime(int(m.group(3)), month, int(m.group(2)), hour, int(m.group(5)))
+
+
+def _first(tree, selector):
+    nodes = selector(tree)
+    return nodes[0] if nodes else None
+
+
+def _text(node):
+    # Collapse runs of whitespace, so markup line breaks inside a heading or
+    # name don't end up in the field
+    return " ".join(node.text_content().split()) if node is not None else None
+
+
+def parse_article(html, url, domain=None):
+    """
+    Extract the article fields from a CRHoy page. Callers scraping many
+    URLs from one host can pass `domain` to skip re-parsing each URL.
+    """
+    tree = lxml.html.fromstring(html)
     data = {}
 
     # Title
-    title_tag = soup.find("h1", class_="text-left titulo")
-    data["title"] = title_tag.get_text(strip=True) if title_tag else None
+    data["title"] = _text(_first(tree, SEL_TITLE))
 
     # Subtitle
-    subtitle_tag = soup.find("h3", class_="text-uppercase pre-titulo border-deportes")
-    data["subtitle"] = subtitle_tag.get_text(strip=True) if subtitle_tag else None
+    data["subtitle"] = _text(_first(tree, SEL_SUBTITLE))
 
     # Body
-    body_div = soup.find("div", id="contenido")
-    if body_div:
-        paragraphs = body_div.find_all(["p", "blockquote"])
-        texts = [p.get_text(strip=False).strip() for p in paragraphs]
+    body_div = _first(tree, SEL_BODY)
+    if body_div is not None:
+        paragraphs = SEL_BODY_PARAS(body_div)
+        texts = [p.text_content().strip() for p in paragraphs]
         data["body"] = "\n\n".join(texts)
     else:
         data["body"] = None
 
     # URL & domain
     data["url"] = url
-    data["domain"] = urlparse(url).netloc
+    data["domain"] = domain or urlparse(url).netloc
 
     # Author
-    author_tag = soup.find("span", class_="autor-nota")
-    data["author"] = author_tag.get_text(strip=True) if author_tag else None
+    data["author"] = _text(_first(tree, SEL_AUTHOR))
 
     # Author email
-    email_span = soup.find("span", attrs={"ng-show": "displayMail"})
-    data["author_email"] = email_span.get_text(strip=True) if email_span else None
+    data["author_email"] = _text(_first(tree, SEL_AUTHOR_EMAIL))
 
     # Published date
-    date_tag = soup.find("span", class_="fecha-nota")
-    data["published_date"] = date_tag.get_text(strip=True) if date_tag else None
+    data["published_date"] = _text(_first(tree, SEL_DATE))
 
     # Category
     #cat_tag = soup.find("h3", class_="breadcrumbs text-uppercase color-deportes")
-    cat_tag = soup.find("div", class_="categoria-desktop")
-    data["category"] = cat_tag.get_text(strip=True) if cat_tag else None
+    data["category"] = _text(_first(tree, SEL_CATEGORY))
 
     # Tags
     tags = []
-    tag_div = soup.find("div", class_="etiquetas")
-    if tag_div:
+    tag_div = _first(tree, SEL_TAGS)
+    if tag_div is not None:
         # look for <a> within
-        links = tag_div.find_all("a")
+        links = SEL_LINKS(tag_div)
         if links:
-            tags = [a.get_text(strip=True) for a in links]
+            tags = [_text(a) for a in links]
         else:
             # fallback to comma-separated text
-            raw = tag_div.get_text(separator=",", strip=True)
+            raw = ",".join(tag_div.itertext())
             tags = [t.strip() for t in raw.split(",") if t.strip()]
     data["tags"] = tags
 
     return data
 
 
+async def scrape_many(urls):
+    """
+    Fetch and parse urls concurrently. Parsing runs in worker threads so the
+    event loop keeps receiving pages meanwhile. Returns the article dict (or the
+    raised exception) for each URL, in input order.
+    """
+    return await article_fetch.fetch_all(urls, HEADERS, parse=parse_article)
+
+
+def main_batch():
+    urls = list(dict.fromkeys(line.strip() for line in sys.stdin if line.strip()))
+    for url, article in zip(urls, asyncio.run(scrape_many(urls))):
+        if isinstance(article, Exception):
+            print(json.dumps({"error": f"Error scraping {url}: {article}"}), file=sys.stderr)
+        else:
+            sys.stdout.buffer.write(orjson.dumps(article) + b"\n")
+
+
 def main():
     if len(sys.argv) != 2:
-        print(json.dumps({"error": "Usage: python crhoy_scraper.py <article_url>"}), file=sys.stderr)
+        print(json.dumps({"error": "Usage: python crhoy_scraper.py <article_url> | -"}), file=sys.stderr)
         sys.exit(1)
     url = sys.argv[1]
+    if url == "-":
+        main_batch()
+        return
     html = get_page_source(url)
     article = parse_article(html, url)
-    print(json.dumps(article, ensure_ascii=False, indent=2))
+    sys.stdout.buffer.write(orjson.dumps(article, option=orjson.OPT_INDENT_2) + b"\n")
 
 
 if __name__ == "__main__":
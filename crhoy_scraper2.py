@@ -1,33 +1,276 @@
 #!/usr/bin/env python3
-# crhoy_scraper.py
+# crhoy_scraper2.py
 #
 # Usage:
-#   python crhoy_scraper.py <article_url>
+#   python crhoy_scraper2.py <article_url> [<article_url> ...]
 #
 # Dependencies:
-#   pip install selenium webdriver-manager beautifulsoup4 python-dateutil
+#   pip install requests selenium webdriver-manager beautifulsoup4 orjson
+#   plus those of crhoy_scraper.py, whose timestamp parser is shared
 
 import sys
 import json
+import queue
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timezone
 from urllib.parse import urlparse
-from dateutil import parser as dateparser
+from zoneinfo import ZoneInfo
 
+import orjson
+import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException, WebDriverException
+from urllib3.exceptions import HTTPError as TransportError
 from webdriver_manager.chrome import ChromeDriverManager
 
+from crhoy_scraper import parse_timestamp
 
-def get_page_source(url):
+
+_driver = None
+_driver_path = None
+
+COSTA_RICA = ZoneInfo("America/Costa_Rica")
+
+# Pages are fetched over plain HTTP first; the browser is only the fallback
+session = requests.Session()
+session.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)",
+    "Referer": "https://www.crhoy.com/",
+})
+
+# Command-line switches for every headless Chrome
+CHROME_ARGS = (
+    "--headless=new",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--log-level=3",
+    "--blink-settings=imagesEnabled=false",
+)
+
+# Browsers scraping in parallel when several URLs are given
+POOL_SIZE = 3
+
+# Chrome/chromedriver messages meaning the browser itself is gone
+DEAD_SESSION_MESSAGES = ("chrome not reachable", "disconnected", "session deleted", "target crashed")
+
+# Requests Chrome drops before they hit the network; only the HTML is needed
+BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*",
+]
+
+# Pulls every article field out of the live DOM in one WebDriver round trip,
+# with the same selectors parse_article uses
+EXTRACT_JS = """
+const text = (sel) => {
+    const el = document.querySelector(sel);
+    return el ? el.textContent.trim() : null;
+};
+const body = document.querySelector("div#contenido");
+const tagDiv = document.querySelector("div.etiquetas");
+let tags = [];
+if (tagDiv) {
+    const links = Array.from(tagDiv.querySelectorAll("a"), (a) => a.textContent.trim());
+    tags = links.length ? links : tagDiv.textContent.split(",").map((t) => t.trim()).filter(Boolean);
+}
+return {
+    title: text("h1.text-left.titulo"),
+    subtitle: text("h3.text-uppercase.pre-titulo.border-deportes"),
+    body: body ? Array.from(body.querySelectorAll("p, blockquote"), (p) => p.textContent.trim()).join("\\n\\n") : null,
+    author: text("span.autor-nota"),
+    author_email: text('span[ng-show="displayMail"]'),
+    date: text("span.fecha-nota"),
+    category: text("div.categoria-desktop"),
+    tags: tags,
+};
+"""
+
+
+def _chrome_options():
     opts = Options()
-    opts.headless = True
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=opts)
+    for arg in CHROME_ARGS:
+        opts.add_argument(arg)
+    # The article markup is server-rendered; don't wait for subresources
+    opts.page_load_strategy = "eager"
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    return opts
+
+
+def new_driver():
+    global _driver_path
+    # Resolve (and download, if needed) chromedriver once per process
+    if _driver_path is None:
+        _driver_path = ChromeDriverManager().install()
+    service = Service(_driver_path)
+    driver = webdriver.Chrome(service=service, options=_chrome_options())
+    driver.set_page_load_timeout(8)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+def get_driver():
+    """
+    Return the shared headless Chrome, starting it on first use so that
+    repeated get_page_source calls don't pay the browser cold start.
+    """
+    global _driver
+    if _driver is None:
+        _driver = new_driver()
+        atexit.register(_driver.quit)
+    return _driver
+
+
+def session_lost(error):
+    """
+    True if error means the browser session can't be used any more, as
+    opposed to a failure of one page such as a page load timeout.
+    """
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    if isinstance(error, WebDriverException):
+        message = (error.msg or "").lower()
+        return any(text in message for text in DEAD_SESSION_MESSAGES)
+    # chromedriver itself stopped answering
+    return isinstance(error, (ConnectionError, TransportError))
+
+
+class DriverPool:
+    """
+    Up to `size` Chrome drivers shared by worker threads, each started the
+    first time it is needed and then kept warm. A driver whose session is
+    lost is quit and replaced by a fresh one; after any other error, e.g. a
+    page load timeout, it goes back to the pool as is.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        self._size = size
+        self._started = 0
+        self._lock = threading.Lock()
+        self._drivers = queue.Queue()
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._drivers.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                start = self._started < self._size
+                if start:
+                    self._started += 1
+            if start:
+                try:
+                    return new_driver()
+                except Exception:
+                    with self._lock:
+                        self._started -= 1
+                    raise
+            # All drivers are busy; wait for one to come back, or for the
+            # slot of one that couldn't be replaced
+            try:
+                return self._drivers.get(timeout=1)
+            except queue.Empty:
+                pass
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        except Exception as e:
+            if not session_lost(e):
+                raise
+            # Never hand the dead session back; if no replacement starts,
+            # free its slot so _acquire can try again later
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            try:
+                driver = new_driver()
+            except Exception:
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                self._drivers.put(driver)
+            else:
+                with self._lock:
+                    self._started -= 1
+
+    def close(self):
+        while not self._drivers.empty():
+            self._drivers.get().quit()
+
+
+def get_page_source(url, driver=None):
+    driver = driver or get_driver()
     driver.get(url)
-    html = driver.page_source
-    driver.quit()
-    return html
+    return driver.page_source
+
+
+def _utc_isoformat(date_text):
+    # CRHoy prints Costa Rica local time, e.g. "Mayo 21, 2025 11:37 pm"
+    try:
+        dt = parse_timestamp(date_text).replace(tzinfo=COSTA_RICA)
+    except ValueError:
+        return None
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def extract_article(url, driver=None):
+    """
+    Load url and read the article fields straight from the browser with
+    EXTRACT_JS, instead of serializing page_source and re-parsing it with
+    BeautifulSoup. Returns the same dict as parse_article.
+    """
+    driver = driver or get_driver()
+    driver.get(url)
+    raw = driver.execute_script(EXTRACT_JS)
+    return {
+        "title": raw["title"],
+        "subtitle": raw["subtitle"],
+        "body": raw["body"],
+        "url": url,
+        "domain": urlparse(url).netloc,
+        "author": raw["author"],
+        "author_email": raw["author_email"],
+        "published_date": _utc_isoformat(raw["date"]) if raw["date"] else None,
+        "category": raw["category"],
+        "tags": raw["tags"],
+    }
+
+
+def scrape_article(url, pool=None):
+    """
+    Fetch url over plain HTTP and parse it, falling back to the browser
+    (a driver from `pool`, or the shared one) when the request fails or the
+    response has no div#contenido, e.g. a bot challenge page.
+    """
+    try:
+        resp = session.get(url, timeout=10)
+        resp.raise_for_status()
+        article = parse_article(resp.content, url)
+        if article["body"] is not None:
+            return article
+    except requests.RequestException:
+        pass
+    if pool is None:
+        return extract_article(url)
+    with pool.driver() as driver:
+        return extract_article(url, driver)
 
 
 def parse_article(html, url):
@@ -66,9 +309,7 @@ def parse_article(html, url):
     # Published date (UTC)
     date_tag = soup.find("span", class_="fecha-nota")
     if date_tag:
-        # parse and convert to ISO UTC
-        dt = dateparser.parse(date_tag.get_text(strip=True))
-        data["published_date"] = dt.astimezone(dateparser.tz.UTC).isoformat()
+        data["published_date"] = _utc_isoformat(date_tag.get_text(strip=True))
     else:
         data["published_date"] = None
 
@@ -92,13 +333,30 @@ def parse_article(html, url):
 
 
 def main():
-    if len(sys.argv) != 2:
-        print(json.dumps({"error": "Usage: python crhoy_scraper.py <article_url>"}), file=sys.stderr)
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "Usage: python crhoy_scraper2.py <article_url> [<article_url> ...]"}), file=sys.stderr)
         sys.exit(1)
-    url = sys.argv[1]
-    html = get_page_source(url)
-    article = parse_article(html, url)
-    print(json.dumps(article, ensure_ascii=False, indent=2))
+    urls = sys.argv[1:]
+    if len(urls) == 1:
+        result = scrape_article(urls[0])
+    else:
+        # Browsers for the pages plain HTTP can't get, shared by the batch
+        pool = DriverPool(min(POOL_SIZE, len(urls)))
+
+        def scrape(url):
+            # One bad URL shouldn't cost the rest of the batch
+            try:
+                return scrape_article(url, pool)
+            except Exception as e:
+                print(json.dumps({"error": f"Error scraping {url}: {e}"}), file=sys.stderr)
+                return None
+
+        try:
+            with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+                result = [article for article in executor.map(scrape, urls) if article is not None]
+        finally:
+            pool.close()
+    sys.stdout.buffer.write(orjson.dumps(result, option=orjson.OPT_INDENT_2) + b"\n")
 
 
 if __name__ == "__main__":
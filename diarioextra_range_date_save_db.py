@@ -5,19 +5,26 @@ diarioextra_range_date_save_db.py
 Usage:
   python diarioextra_range_date_save_db.py <start_date YYYY-MM-DD> <end_date YYYY-MM-DD>
 
-This script uses diarioextra_range_date_scraper.py to fetch articles in JSON format
-for a given date range, then writes each article to the "articles" table in Supabase.
+This script uses diarioextra_range_date_scraper to fetch the articles for a given
+date range and writes them to the "articles" table in Supabase in
+batches while the scraper is still running.
+Articles whose title and body are already stored under another URL are skipped
+by content_hash (requires sql/002_articles_content_hash.sql).
 It logs the total found, how many were saved successfully, and any errors.
 """
 import sys
 import os
-import json
 import logging
-import subprocess
+import queue
+import threading
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client
 
+import diarioextra_range_date_scraper as scraper
+from article_dedupe import ContentFilter, save_articles
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -29,6 +36,11 @@ LOG_FILE = os.path.join(LOG_DIR, "diarioextra_range_date_save_db_log")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Rows per bulk upsert request
+BATCH_SIZE = 500
+# Batches upserted at once; each request mostly waits on the round trip
+WRITER_THREADS = 8
+
 def setup_logging():
     os.makedirs(LOG_DIR, exist_ok=True)
     logging.basicConfig(
@@ -40,64 +52,129 @@ def setup_logging():
         ]
     )
 
-def fetch_articles(start_date: str, end_date: str):
-    """
-    Calls diarioextra_range_date_scraper.py and captures JSON output lines.
-    Returns a list of article dicts.
+def fetch_articles(start_date, end_date):
     """
-    cmd = [sys.executable, "diarioextra_range_date_scraper.py", start_date, end_date]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.stderr:
-        logging.error(f"Errors from scraper:\n{result.stderr}")
-    articles = []
-    for line in result.stdout.splitlines():
-        try:
-            articles.append(json.loads(line))
-        except json.JSONDecodeError:
-            logging.warning(f"Skipping non-JSON output: {line}")
-    return articles
-
-def save_to_supabase(articles):
-    """
-    Inserts each article dict into Supabase 'articles' table.
-    Returns (count_success, errors_list)
+    Scrapes the Diario Extra articles for start_date to end_date
+    (datetime.date, inclusive) in this process, yielding each article dict
+    as soon as it is parsed. The scraper's progress goes to its own log file.
     """
+    os.makedirs(scraper.LOG_DIR, exist_ok=True)
+    with open(scraper.LOG_FILE, "w", encoding="utf-8") as log:
+        urls = scraper.collect_urls(start_date, end_date, log)
+        logging.info(f"Found {len(urls)} article URLs in the sitemaps")
+        yield from scraper.iter_articles(urls, log)
+
+def get_client():
     if not SUPABASE_URL or not SUPABASE_KEY:
         logging.error("SUPABASE_URL or SUPABASE_KEY not set in environment.")
         sys.exit(1)
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
-    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def upsert_articles(client, rows):
+    """
+    Upsert one article dict or a list of them, raising on an error response.
+    URLs already in the table are skipped by ON CONFLICT (url) DO NOTHING.
+    Returns the number of rows inserted.
+    """
+    # Ask for the inserted count instead of the rows, so the article bodies
+    # aren't sent back in the response
+    resp = client.table("articles").upsert(
+        rows, on_conflict="url", ignore_duplicates=True, returning="minimal", count="exact"
+    ).execute()
+    # Supabase response may include 'error' key
+    if hasattr(resp, 'error') and resp.error:
+        raise Exception(resp.error)
+    return resp.count or 0
+
+def save_to_supabase(client, articles, content_filter):
+    """
+    Inserts article dicts into Supabase 'articles' table in batches of BATCH_SIZE,
+    skipping URLs that are already stored (requires sql/001_articles_url_unique.sql)
+    and content that content_filter knows or finds stored (see article_dedupe).
+    A batch that fails is retried one row at a time, so only the bad rows are lost.
+    Returns (count_success, count_inserted, errors_list), where count_inserted
+    leaves out the articles that were already stored.
+    """
+    # Send each URL once; later copies of an article replace earlier ones
+    unique = list({article.get("url"): article for article in articles}.values())
+    if len(unique) < len(articles):
+        logging.info(f"Dropped {len(articles) - len(unique)} duplicate URLs from batch")
     success = 0
+    inserted = 0
     errors = []
-    for article in articles:
-        url = article.get("url")
-        try:
-            resp = client.table("articles").insert(article).execute()
-            # Supabase response may include 'error' key
-            if hasattr(resp, 'error') and resp.error:
-                raise Exception(resp.error)
-            success += 1
-            logging.info(f"Saved article: {url}")
-        except Exception as e:
-            logging.error(f"ERROR saving {url}: {e}")
-            errors.append((url, str(e)))
-    return success, errors
+    for start in range(0, len(unique), BATCH_SIZE):
+        chunk = unique[start:start + BATCH_SIZE]
+        saved, new = save_articles(chunk, lambda rows: upsert_articles(client, rows), content_filter, errors)
+        success += saved
+        inserted += new
+    return success, inserted, errors
+
+def save_stream(articles):
+    """
+    Saves articles from an iterable as they arrive: every BATCH_SIZE articles
+    are handed to one of WRITER_THREADS writer threads, so batches are
+    upserted side by side while the next one is still being scraped.
+    Returns (count_total, count_success, count_inserted, errors_list)
+    """
+    client = get_client()
+    content_filter = ContentFilter(client)
+    batches = queue.Queue(maxsize=2 * WRITER_THREADS)
+    results = {"success": 0, "inserted": 0, "errors": []}
+    results_lock = threading.Lock()
+
+    def writer():
+        while (batch := batches.get()) is not None:
+            try:
+                success, inserted, errors = save_to_supabase(client, batch, content_filter)
+            except Exception as e:
+                # Keep draining the queue, or a dead writer stalls the scraper
+                logging.error(f"Error saving {len(batch)} articles: {e}")
+                success, inserted = 0, 0
+                errors = [(article.get('url'), str(e)) for article in batch]
+            with results_lock:
+                results["success"] += success
+                results["inserted"] += inserted
+                results["errors"].extend(errors)
+
+    threads = [threading.Thread(target=writer, daemon=True) for _ in range(WRITER_THREADS)]
+    for thread in threads:
+        thread.start()
+    total = 0
+    batch = []
+    try:
+        for article in articles:
+            total += 1
+            batch.append(article)
+            if len(batch) >= BATCH_SIZE:
+                batches.put(batch)
+                batch = []
+        if batch:
+            batches.put(batch)
+    finally:
+        for thread in threads:
+            batches.put(None)
+        for thread in threads:
+            thread.join()
+    return total, results["success"], results["inserted"], results["errors"]
 
 
 def main():
     if len(sys.argv) != 3:
         print("Usage: python diarioextra_range_date_save_db.py <start_date YYYY-MM-DD> <end_date YYYY-MM-DD>")
         sys.exit(1)
-    start_date, end_date = sys.argv[1], sys.argv[2]
+    try:
+        start_date = datetime.strptime(sys.argv[1], "%Y-%m-%d").date()
+        end_date = datetime.strptime(sys.argv[2], "%Y-%m-%d").date()
+    except ValueError as e:
+        print(f"Invalid date: {e}")
+        sys.exit(1)
 
     setup_logging()
     logging.info(f"Fetching articles from {start_date} to {end_date}")
-    articles = fetch_articles(start_date, end_date)
-    total = len(articles)
+    total, success, inserted, errors = save_stream(fetch_articles(start_date, end_date))
     logging.info(f"Found {total} articles")
-
-    success, errors = save_to_supabase(articles)
     logging.info(f"Successfully saved {success} articles out of {total}")
+    logging.info(f"{inserted} new, {success - inserted} already stored")
     if errors:
         logging.info("Errors encountered during save:")
         for url, err in errors:
@@ -5,21 +5,44 @@
 #   python diarioextra_range_date_scraper.py <start_date YYYY-MM-DD> <end_date YYYY-MM-DD>
 #
 # Dependencies:
-#   pip install selenium webdriver-manager beautifulsoup4 python-dateutil requests
+#   pip install aiohttp aiolimiter lxml python-dateutil requests orjson
 
 import sys
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import json
-import xml.etree.ElementTree as ET
+import orjson
+from lxml import etree
 from datetime import datetime, date
 from dateutil import parser as dateparser
 
-from diarioextra_scraper import get_page_source, parse_article
+from diarioextra_scraper import iter_page_sources, parse_article
 
 LOG_DIR = "LOG"
 LOG_FILE = os.path.join(LOG_DIR, "diarioextra_range_date_scraper_log")
 
+# Host serving both the sitemaps and the articles they list
+DOMAIN = "www.diarioextra.com"
+# Monthly sitemaps downloaded at once
+SITEMAP_WORKERS = 8
+
+# One keep-alive session for every sitemap request
+session = requests.Session()
+session.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)",
+    "Accept": "application/xml, text/xml, */*; q=0.1",
+    "Referer": "https://www.diarioextra.com/"
+})
+# Retry transient sitemap failures with exponential backoff instead of
+# losing the whole month
+session.mount("https://", HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",)),
+    pool_maxsize=SITEMAP_WORKERS,
+))
+
 def month_range(start_date, end_date):
     # Yield each (year, month) tuple from start_date to end_date inclusive
     current = date(start_date.year, start_date.month, 1)
@@ -32,6 +55,85 @@ def month_range(start_date, end_date):
             current = date(current.year, current.month + 1, 1)
 
 
+def fetch_sitemap(sitemap_url):
+    """
+    Return the (loc, lastmod) text pairs listed in a monthly sitemap,
+    skipping entries that lack either one.
+    """
+    entries = []
+    with session.get(sitemap_url, timeout=10, stream=True) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        # Stream <url> entries instead of building the whole tree
+        for _, url_elem in etree.iterparse(resp.raw, tag="{*}url"):
+            loc = url_elem.findtext("{*}loc")
+            lastmod = url_elem.findtext("{*}lastmod")
+            # Free this entry and the ones already processed
+            url_elem.clear()
+            while url_elem.getprevious() is not None:
+                del url_elem.getparent()[0]
+            if loc is not None and lastmod is not None:
+                entries.append((loc.strip(), lastmod.strip()))
+    return entries
+
+
+def collect_urls(start_date, end_date, log):
+    """
+    Return the distinct article URLs whose sitemap lastmod falls between
+    start_date and end_date (datetime.date, inclusive), in month order.
+    Progress and errors are written to the open file log.
+    """
+    article_urls = []
+    sitemap_urls = [
+        f"https://{DOMAIN}/sitemap-posttype-portada.{year}{month:02}.xml"
+        for year, month in month_range(start_date, end_date)
+    ]
+    # Download the monthly sitemaps concurrently, then walk them in month order
+    with ThreadPoolExecutor(max_workers=SITEMAP_WORKERS) as pool:
+        futures = [pool.submit(fetch_sitemap, sitemap_url) for sitemap_url in sitemap_urls]
+        for sitemap_url, future in zip(sitemap_urls, futures):
+            log.write(f"Fetching sitemap: {sitemap_url}\n")
+            try:
+                entries = future.result()
+            except Exception as e:
+                log.write(f"ERROR fetching sitemap {sitemap_url}: {e}\n")
+                continue
+            for url, lastmod_text in entries:
+                try:
+                    # W3C datetimes start with the date; keep dateutil for anything unusual
+                    try:
+                        mod_dt = date.fromisoformat(lastmod_text[:10])
+                    except ValueError:
+                        mod_dt = dateparser.parse(lastmod_text).date()
+                except Exception as e:
+                    log.write(f"ERROR parsing lastmod '{lastmod_text}' for URL {url}: {e}\n")
+                    continue
+                if start_date <= mod_dt <= end_date:
+                    article_urls.append(url)
+                    log.write(f"FOUND URL: {url} lastmod {mod_dt}\n")
+
+    # Deduplicate URLs while preserving order
+    return list(dict.fromkeys(article_urls))
+
+
+def iter_articles(article_urls, log):
+    """
+    Scrape the given article URLs, yielding each article dict as soon as
+    its page has been fetched and parsed. Pages that fail are logged to
+    log and skipped.
+    """
+    for url, html in iter_page_sources(article_urls):
+        log.write(f"Processing URL: {url}\n")
+        try:
+            if isinstance(html, Exception):
+                raise html
+            article = parse_article(html, url, domain=DOMAIN)
+        except Exception as e:
+            log.write(f"ERROR processing {url}: {e}\n")
+            continue
+        yield article
+
+
 def main():
     if len(sys.argv) != 3:
         print(json.dumps({"error": "Usage: python diarioextra_range_date_scraper.py <start_date YYYY-MM-DD> <end_date YYYY-MM-DD>"}), file=sys.stderr)
@@ -48,45 +150,12 @@ def main():
 
     os.makedirs(LOG_DIR, exist_ok=True)
     with open(LOG_FILE, "w", encoding="utf-8") as log:
-        article_urls = []
-        # Fetch sitemaps for each month in range
-        for year, month in month_range(start_date, end_date):
-            sitemap_url = f"https://www.diarioextra.com/sitemap-posttype-portada.{year}{month:02}.xml"
-            log.write(f"Fetching sitemap: {sitemap_url}\n")
-            try:
-                resp = requests.get(sitemap_url)
-                resp.raise_for_status()
-                xml_root = ET.fromstring(resp.content)
-                for url_elem in xml_root.findall(".//{*}url"):
-                    loc = url_elem.find("{*}loc")
-                    lastmod = url_elem.find("{*}lastmod")
-                    if loc is None or lastmod is None:
-                        continue
-                    url = loc.text.strip()
-                    lastmod_text = lastmod.text.strip()
-                    try:
-                        mod_dt = dateparser.parse(lastmod_text).date()
-                    except Exception as e:
-                        log.write(f"ERROR parsing lastmod '{lastmod_text}' for URL {url}: {e}\n")
-                        continue
-                    if start_date <= mod_dt <= end_date:
-                        article_urls.append(url)
-                        log.write(f"FOUND URL: {url} lastmod {mod_dt}\n")
-            except Exception as e:
-                log.write(f"ERROR fetching sitemap {sitemap_url}: {e}\n")
-
-        # Deduplicate URLs while preserving order
-        article_urls = list(dict.fromkeys(article_urls))
-
-        # Process each article URL
-        for url in article_urls:
-            log.write(f"Processing URL: {url}\n")
-            try:
-                html = get_page_source(url)
-                article = parse_article(html, url)
-                print(json.dumps(article, ensure_ascii=False))
-            except Exception as e:
-                log.write(f"ERROR processing {url}: {e}\n")
+        # One JSON line per article as soon as it is parsed, so a reader of
+        # stdout can start saving before the whole range is scraped
+        for article in iter_articles(collect_urls(start_date, end_date, log), log):
+            # orjson emits UTF-8 bytes directly, one compact object per line
+            sys.stdout.buffer.write(orjson.dumps(article) + b"\n")
+            sys.stdout.buffer.flush()
 
 if __name__ == "__main__":
     main()
@@ -5,100 +5,144 @@
 #   python diarioextra_scraper.py <article_url>
 #
 # Dependencies:
-#   pip install selenium webdriver-manager beautifulsoup4 python-dateutil
+#   pip install aiohttp aiolimiter lxml python-dateutil orjson
 
 import sys
 import json
-import re
 from urllib.parse import urlparse
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from dateutil import parser as dateparser
 
-from bs4 import BeautifulSoup, Tag
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import orjson
+import lxml.html
+from lxml import etree
 
+import article_fetch
+from article_fetch import has_class as _class
 
-def get_page_source(url, headless=True):
-    opts = Options()
-    if headless:
-        opts.add_argument("--headless=new")  # truly headless mode
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--log-level=3")
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)",
+    "Referer": "https://www.diarioextra.com/",
+}
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=opts)
-    driver.get(url)
-    html = driver.page_source
-    driver.quit()
-    return html
 
+# XPath selectors, compiled once at import. Like CSS selectors they match
+# the context node and its descendants, so they work on subtrees too.
+SEL_OG_TITLE = etree.XPath("descendant-or-self::meta[@property='og:title']")
+SEL_H1 = etree.XPath("descendant-or-self::h1")
+SEL_DESCRIPTION = etree.XPath("descendant-or-self::meta[@name='description']")
+SEL_H2 = etree.XPath("descendant-or-self::h2")
+# Body containers, in order of preference
+SEL_CONTENT = (
+    etree.XPath(f"descendant-or-self::div[{_class('single-layout__article')}]"),
+    etree.XPath(f"descendant-or-self::div[{_class('entry-content')}]"),
+    etree.XPath("descendant-or-self::article"),
+)
+SEL_PARAS = etree.XPath("descendant-or-self::*[self::p or self::blockquote]")
+SEL_META_AUTHOR = etree.XPath("descendant-or-self::meta[@name='author']")
+SEL_AUTHOR = etree.XPath(f"descendant-or-self::span[{_class('single-layout__meta-name')}]")
+SEL_AUTHOR_EMAIL = etree.XPath(f"descendant-or-self::span[{_class('single-layout__meta-email')}]")
+SEL_PUBLISHED = etree.XPath("descendant-or-self::meta[@property='article:published_time']")
+SEL_DATE = etree.XPath(f"descendant-or-self::span[{_class('single-layout__meta-date')}]")
+SEL_FEED_HEADING = etree.XPath(f"descendant-or-self::div[{_class('feed__heading')}]")
+SEL_SECTION = etree.XPath("descendant-or-self::meta[@property='article:section']")
+SEL_CATEGORY_LINK = etree.XPath(f"descendant-or-self::a[{_class('single-layout__meta-category')}]")
+SEL_BREADCRUMBS = etree.XPath(f"descendant-or-self::ul[{_class('breadcrumb')}]//li//a")
+SEL_TAG_META = etree.XPath("descendant-or-self::meta[@property='article:tag']")
+SEL_TAG_SWIPER = etree.XPath(f"descendant-or-self::x-swiper[{_class('tag-layout')}]")
+SEL_LINKS = etree.XPath("descendant-or-self::a")
 
-def parse_article(html, url):
-    soup = BeautifulSoup(html, "lxml")
+
+def get_page_sources(urls):
+    return article_fetch.get_page_sources(urls, HEADERS)
+
+
+def iter_page_sources(urls):
+    return article_fetch.iter_page_sources(urls, HEADERS)
+
+
+def get_page_source(url):
+    return article_fetch.get_page_source(url, HEADERS)
+
+
+def _first(tree, selector):
+    nodes = selector(tree)
+    return nodes[0] if nodes else None
+
+
+def _text(node):
+    # Collapse runs of whitespace, so markup line breaks inside a heading or
+    # name don't end up in the field
+    return " ".join(node.text_content().split()) if node is not None else None
+
+
+def parse_article(html, url, domain=None):
+    """
+    Extract the article fields from a Diario Extra page. Callers scraping
+    many URLs from one host can pass `domain` to skip re-parsing each URL.
+    """
+    tree = lxml.html.fromstring(html)
     data = {}
 
     # Title
-    og_title = soup.find("meta", property="og:title")
-    if og_title and og_title.get("content"):
-        data["title"] = og_title["content"].strip()
+    og_title = _first(tree, SEL_OG_TITLE)
+    if og_title is not None and og_title.get("content"):
+        data["title"] = og_title.get("content").strip()
     else:
-        h1 = soup.find("h1")
-        data["title"] = h1.get_text(strip=True) if h1 else None
+        data["title"] = _text(_first(tree, SEL_H1))
 
     # Subtitle
-    desc = soup.find("meta", attrs={"name": "description"})
-    if desc and desc.get("content"):
-        data["subtitle"] = desc["content"].strip()
+    desc = _first(tree, SEL_DESCRIPTION)
+    if desc is not None and desc.get("content"):
+        data["subtitle"] = desc.get("content").strip()
     else:
-        h2 = soup.find("h2")
-        data["subtitle"] = h2.get_text(strip=True) if h2 else None
+        data["subtitle"] = _text(_first(tree, SEL_H2))
 
     # Body
-    content = (
-        soup.find("div", class_="single-layout__article")
-        or soup.find("div", class_="entry-content")
-        or soup.find("article")
-    )
-    if content:
-        paras = content.find_all(["p", "blockquote"])
-        data["body"] = "\n\n".join(p.get_text(strip=False).strip() for p in paras)
+    content = None
+    for selector in SEL_CONTENT:
+        content = _first(tree, selector)
+        if content is not None:
+            break
+    if content is not None:
+        paras = SEL_PARAS(content)
+        data["body"] = "\n\n".join(p.text_content().strip() for p in paras)
     else:
         data["body"] = None
 
     # URL & domain
     data["url"] = url
-    data["domain"] = urlparse(url).netloc
+    data["domain"] = domain or urlparse(url).netloc
 
     # Author
-    meta_author = soup.find("meta", attrs={"name": "author"})
-    if meta_author and meta_author.get("content"):
-        data["author"] = meta_author["content"].strip()
+    meta_author = _first(tree, SEL_META_AUTHOR)
+    if meta_author is not None and meta_author.get("content"):
+        data["author"] = meta_author.get("content").strip()
     else:
-        span = soup.find("span", class_="single-layout__meta-name")
-        data["author"] = span.get_text(strip=True) if span else None
+        data["author"] = _text(_first(tree, SEL_AUTHOR))
 
     # Author email
-    email_span = soup.find("span", class_="single-layout__meta-email")
-    data["author_email"] = email_span.get_text(strip=True) if email_span else None
+    data["author_email"] = _text(_first(tree, SEL_AUTHOR_EMAIL))
 
     # Published date: convert to UTC
     # Try ISO meta first
-    pub_meta = soup.find("meta", property="article:published_time")
-    if pub_meta and pub_meta.get("content"):
-        dt = dateparser.parse(pub_meta["content"])
+    pub_meta = _first(tree, SEL_PUBLISHED)
+    if pub_meta is not None and pub_meta.get("content"):
+        published = pub_meta.get("content").strip()
+        try:
+            # WordPress emits ISO 8601; keep dateutil for anything unusual
+            dt = datetime.fromisoformat(published)
+        except ValueError:
+            dt = dateparser.parse(published)
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=ZoneInfo("America/Costa_Rica"))
         dt_utc = dt.astimezone(ZoneInfo("UTC"))
         data["published_date"] = dt_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
     else:
-        span_date = soup.find("span", class_="single-layout__meta-date")
-        if span_date:
-            date_text = span_date.get_text(strip=True)  # e.g. 29/05/2025 - 16:02
+        span_date = _first(tree, SEL_DATE)
+        if span_date is not None:
+            date_text = _text(span_date)  # e.g. 29/05/2025 - 16:02
             try:
                 dt_local = datetime.strptime(date_text, "%d/%m/%Y - %H:%M")
                 dt_local = dt_local.replace(tzinfo=ZoneInfo("America/Costa_Rica"))
@@ -110,29 +154,29 @@ def parse_article(html, url):
             data["published_date"] = None
 
     # Category: from feed__heading div
-    cat_div = soup.find("div", class_="feed__heading")
-    if cat_div:
-        data["category"] = cat_div.get_text(strip=True)
+    cat_div = _first(tree, SEL_FEED_HEADING)
+    if cat_div is not None:
+        data["category"] = _text(cat_div)
     else:
         # fallback to section meta or breadcrumb
-        sec_meta = soup.find("meta", property="article:section")
-        if sec_meta and sec_meta.get("content"):
-            data["category"] = sec_meta["content"].strip()
+        sec_meta = _first(tree, SEL_SECTION)
+        if sec_meta is not None and sec_meta.get("content"):
+            data["category"] = sec_meta.get("content").strip()
         else:
-            cat_link = soup.find("a", class_="single-layout__meta-category")
-            if not cat_link:
-                crumbs = soup.select("ul.breadcrumb li a")
+            cat_link = _first(tree, SEL_CATEGORY_LINK)
+            if cat_link is None:
+                crumbs = SEL_BREADCRUMBS(tree)
                 if len(crumbs) >= 2:
                     cat_link = crumbs[-2]
-            data["category"] = cat_link.get_text(strip=True) if cat_link else None
+            data["category"] = _text(cat_link)
 
     # Tags
-    tags = [m["content"].strip() for m in soup.find_all("meta", property="article:tag") if m.get("content")]
+    tags = [m.get("content").strip() for m in SEL_TAG_META(tree) if m.get("content")]
     if not tags:
-        swiper = soup.find("x-swiper", class_="tag-layout")
-        if swiper:
-            links = swiper.find_all("a")
-            tags = [a.get_text(strip=True).lstrip("#") for a in links]
+        swiper = _first(tree, SEL_TAG_SWIPER)
+        if swiper is not None:
+            links = SEL_LINKS(swiper)
+            tags = [_text(a).lstrip("#") for a in links]
     data["tags"] = tags
 
     return data
@@ -145,7 +189,7 @@ def main():
     url = sys.argv[1]
     html = get_page_source(url)
     article = parse_article(html, url)
-    print(json.dumps(article, ensure_ascii=False, indent=2))
+    sys.stdout.buffer.write(orjson.dumps(article, option=orjson.OPT_INDENT_2) + b"\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,11 @@
+-- Unique URL constraint for the "articles" table.
+--
+-- The save scripts write with upsert(on_conflict="url", ignore_duplicates=True),
+-- i.e. INSERT ... ON CONFLICT (url) DO NOTHING, which needs a unique index on url.
+--
+-- If the table already holds duplicate URLs, remove them first, keeping the
+-- oldest copy of each:
+--   DELETE FROM articles a USING articles b
+--   WHERE a.url = b.url AND a.ctid > b.ctid;
+
+ALTER TABLE articles ADD CONSTRAINT articles_url_key UNIQUE (url);
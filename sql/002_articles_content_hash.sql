@@ -0,0 +1,13 @@
+-- Content hash column for the "articles" table.
+--
+-- The save scripts fill content_hash with a blake2b hash of the article's
+-- title and body, and skip articles whose hash is already stored, so the same
+-- article scraped under another URL (trailing slash, query string, ...) is
+-- only saved once. The unique index backs that check up. Articles without a
+-- body (video and gallery pages) get a NULL hash, since their title alone
+-- would make distinct posts collide; NULLs never conflict in the index, so
+-- they are always saved. Rows saved before this migration keep a NULL hash
+-- too and are not compared.
+
+ALTER TABLE articles ADD COLUMN content_hash text;
+CREATE UNIQUE INDEX articles_content_hash_key ON articles (content_hash);